@@ -0,0 +1,216 @@
+import re
+import zlib
+import difflib
+import argparse
+import numpy as np
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_BANDS = 32
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# difflib is quadratic in the text length, so exact (word-level) ratios are only computed for short pairs.
+EXACT_DIFF_MAX_CHARS = 4000
+# An output is an outlier when its mean similarity to the others sits this many
+# robust standard deviations below the median.
+OUTLIER_Z = 3.0
+OUTLIER_MIN_SPREAD = 0.05
+
+_WORD_RE = re.compile(r"\w+")
+_EMPTY_HASH = np.iinfo(np.uint64).max
+
+class MinHasher:
+    """MinHash signatures over word shingles (character shingles for text without words).
+
+    Each permutation is a multiply-shift hash of the 32-bit shingle hash, evaluated
+    for all shingles and permutations at once with numpy.
+    """
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, shingle_size: int = DEFAULT_SHINGLE_SIZE, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Odd multipliers keep the multiply-shift family universal.
+        self._a = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        tokens = _WORD_RE.findall(text.lower())
+        k = self.shingle_size
+        if not tokens:
+            # Punctuation-only output still deserves a real signature, otherwise it
+            # would share the empty sentinel with every other such output.
+            chars = "".join(text.split())
+            if len(chars) < k:
+                grams = [chars] if chars else []
+            else:
+                grams = [chars[i:i + k] for i in range(len(chars) - k + 1)]
+        elif len(tokens) < k:
+            grams = [" ".join(tokens)] if tokens else []
+        else:
+            grams = [" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        return np.unique(hashes)
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return np.full(self.num_perm, _EMPTY_HASH, dtype=np.uint64)
+        hashed = (shingles[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(32)
+        return hashed.min(axis=0)
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.num_perm), dtype=np.uint64)
+        return np.vstack([self.signature(t) for t in texts])
+
+def is_empty_signature(signatures: np.ndarray) -> np.ndarray:
+    """Mask of signatures built from text that had no shingles at all."""
+    return (signatures == _EMPTY_HASH).all(axis=1)
+
+def similarity_matrix(signatures: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity between every pair of signatures."""
+    n = len(signatures)
+    matrix = np.empty((n, n), dtype=np.float64)
+    # One row at a time keeps memory at n * num_perm instead of n^2 * num_perm.
+    for i in range(n):
+        matrix[i] = (signatures == signatures[i]).mean(axis=1)
+    return matrix
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int = DEFAULT_BANDS) -> np.ndarray:
+    """Pairs (i, j), i < j, that share at least one LSH band bucket.
+
+    With `bands` bands of `num_perm // bands` rows, pairs whose similarity is
+    above roughly (1 / bands) ** (bands / num_perm) are very likely to collide.
+    """
+    n, num_perm = signatures.shape
+    rows = max(1, num_perm // bands)
+    # Empty texts all carry the same sentinel signature and would land in one huge bucket.
+    candidates = np.nonzero(~is_empty_signature(signatures))[0]
+    pairs = set()
+    for start in range(0, rows * bands, rows):
+        buckets = defaultdict(list)
+        band = np.ascontiguousarray(signatures[:, start:start + rows])
+        for i in candidates:
+            buckets[band[i].tobytes()].append(int(i))
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.array(sorted(pairs), dtype=np.int64)
+
+def find_near_duplicates(signatures: np.ndarray,
+                         threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                         bands: int = DEFAULT_BANDS) -> List[Tuple[int, int, float]]:
+    """Near-duplicate pairs found through LSH, without scoring every pair."""
+    pairs = lsh_candidate_pairs(signatures, bands)
+    if not len(pairs):
+        return []
+    scores = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    keep = scores >= threshold
+    return [(int(i), int(j), float(s)) for (i, j), s in zip(pairs[keep], scores[keep])]
+
+def find_outliers(matrix: np.ndarray) -> List[int]:
+    """Indices whose mean similarity to the others is unusually low."""
+    n = len(matrix)
+    if n < 3:
+        return []
+    mean_sim = (matrix.sum(axis=1) - matrix.diagonal()) / (n - 1)
+    median = np.median(mean_sim)
+    spread = max(1.4826 * np.median(np.abs(mean_sim - median)), OUTLIER_MIN_SPREAD)
+    return [int(i) for i in np.nonzero((median - mean_sim) / spread > OUTLIER_Z)[0]]
+
+def analyze_comparison(comparison: Dict[str, Any],
+                       threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                       exact: bool = True,
+                       hasher: Optional[MinHasher] = None) -> Dict[str, Any]:
+    """Pairwise similarity report for the successful outputs of one comparison.
+
+    Accepts a stored comparison dict or just its `results` list.
+    """
+    results = comparison.get("results", []) if isinstance(comparison, dict) else comparison
+    entries = [r for r in results if not r.get("error") and r.get("result")]
+    models = [r["model_id"] for r in entries]
+    texts = [r["result"].get("content") or "" for r in entries]
+
+    hasher = hasher or MinHasher()
+    signatures = hasher.signatures(texts)
+    matrix = similarity_matrix(signatures)
+    # Empty outputs hash to the same sentinel signature; they are not similar to anything.
+    empty = is_empty_signature(signatures)
+    if empty.any():
+        matrix[empty, :] = 0.0
+        matrix[:, empty] = 0.0
+        np.fill_diagonal(matrix, 1.0)
+
+    exact_matrix = None
+    if exact:
+        words = [t.split() if len(t) <= EXACT_DIFF_MAX_CHARS else None for t in texts]
+        exact_matrix = [[1.0 if i == j else None for j in range(len(texts))] for i in range(len(texts))]
+        for i in range(len(texts)):
+            if words[i] is None:
+                continue
+            matcher = difflib.SequenceMatcher(None, b=words[i])
+            for j in range(i + 1, len(texts)):
+                if words[j] is not None:
+                    matcher.set_seq1(words[j])
+                    exact_matrix[i][j] = exact_matrix[j][i] = matcher.ratio()
+
+    upper_i, upper_j = np.triu_indices(len(models), k=1)
+    duplicate_mask = matrix[upper_i, upper_j] >= threshold
+    near_duplicates = [
+        {"a": models[i], "b": models[j], "similarity": float(matrix[i, j])}
+        for i, j in zip(upper_i[duplicate_mask], upper_j[duplicate_mask])
+    ]
+
+    return {
+        "models": models,
+        "matrix": matrix.round(4).tolist(),
+        "exact": exact_matrix,
+        "near_duplicates": near_duplicates,
+        "outliers": [models[i] for i in find_outliers(matrix)]
+    }
+
+def analyze_history(storage,
+                    threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                    hasher: Optional[MinHasher] = None) -> List[Dict[str, Any]]:
+    """Near-duplicate outputs across every stored comparison, found with LSH."""
+    hasher = hasher or MinHasher()
+    keys = []
+    texts = []
+    index = storage.history()
+    for i in range(len(index)):
+        entry = index[i]
+        if not entry.get("file"):
+            continue
+        try:
+            data = storage.load_comparison(entry["file"])
+        except (OSError, ValueError):
+            continue
+        for res in data.get("results", []):
+            content = (res.get("result") or {}).get("content") if not res.get("error") else None
+            if content and content.strip():
+                keys.append((data.get("comparison_id"), res["model_id"]))
+                texts.append(content)
+
+    pairs = find_near_duplicates(hasher.signatures(texts), threshold)
+    return [
+        {"a": {"comparison_id": keys[i][0], "model_id": keys[i][1]},
+         "b": {"comparison_id": keys[j][0], "model_id": keys[j][1]},
+         "similarity": score}
+        for i, j, score in sorted(pairs, key=lambda p: -p[2])
+    ]
+
+if __name__ == "__main__":
+    from storage import ComparisonStorage
+
+    parser = argparse.ArgumentParser(description="Find near-duplicate model outputs across stored comparisons.")
+    parser.add_argument("--results-dir", default="results", help="Directory holding the comparisons (default: results)")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD, help="Minimum estimated Jaccard similarity")
+    args = parser.parse_args()
+
+    for pair in analyze_history(ComparisonStorage(args.results_dir), args.threshold):
+        a, b = pair["a"], pair["b"]
+        print(f"{pair['similarity']:.2f}  {(a['comparison_id'] or '')[:8]}/{a['model_id']}  {(b['comparison_id'] or '')[:8]}/{b['model_id']}")
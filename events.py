@@ -0,0 +1,60 @@
+import time
+from enum import Enum
+from typing import Callable, Dict, Any, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+class EventType(str, Enum):
+    RUN_START = "run_start"
+    MODEL_START = "model_start"
+    FIRST_TOKEN = "first_token"
+    THINK_START = "think_start"
+    THINK_END = "think_end"
+    CHUNK = "chunk"
+    MODEL_END = "model_end"
+    ERROR = "error"
+    CANCEL = "cancel"
+    RUN_END = "run_end"
+
+Hook = Callable[[Dict[str, Any]], None]
+
+class EventBus:
+    """Synchronous dispatcher for comparison pipeline events.
+
+    Events are plain dicts with `type`, `time` (epoch seconds) and event-specific
+    fields. Emitters check `wants(event_type)` first, so event types nobody
+    subscribed to are never built.
+    """
+    def __init__(self):
+        self._hooks: List[Tuple[Hook, Optional[Set[EventType]]]] = []
+        self._wanted: FrozenSet[EventType] = frozenset()
+
+    def subscribe(self, hook: Hook, types: Optional[Iterable[EventType]] = None) -> Hook:
+        """Call `hook` for every event, or only for the given event types."""
+        self._hooks.append((hook, set(types) if types is not None else None))
+        self._refresh_wanted()
+        return hook
+
+    def unsubscribe(self, hook: Hook):
+        # Compare by equality: bound methods are new objects on every attribute access.
+        self._hooks = [(h, t) for h, t in self._hooks if h != hook]
+        self._refresh_wanted()
+
+    def wants(self, event_type: EventType) -> bool:
+        """Whether any hook listens for `event_type`."""
+        return event_type in self._wanted
+
+    def _refresh_wanted(self):
+        wanted = set()
+        for _, types in self._hooks:
+            wanted |= set(EventType) if types is None else types
+        self._wanted = frozenset(wanted)
+
+    def emit(self, event_type: EventType, **fields):
+        event = {"type": event_type, "time": time.time(), **fields}
+        for hook, types in self._hooks:
+            if types is not None and event_type not in types:
+                continue
+            try:
+                hook(event)
+            except Exception as e:
+                # A broken sink must never take down the comparison run.
+                print(f"Error in event hook {hook!r}: {e}")
@@ -1,12 +1,20 @@
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, GLib, Gio
+from gi.repository import Gtk, Adw, GLib, Gio, GObject, Pango
 import asyncio
 import threading
 import os
 from main import LLMComparator
 from model_manager import ModelState
+from analysis import analyze_comparison, NEAR_DUPLICATE_THRESHOLD
+from events import EventType
+
+try:
+    # PyGObject 3.50+ can run asyncio directly on the GLib main context.
+    from gi.events import GLibEventLoopPolicy
+except ImportError:
+    GLibEventLoopPolicy = None
 
 class ModelRow(Adw.ActionRow):
     def __init__(self, model_id, state):
@@ -44,18 +52,75 @@ class ResultRow(Adw.ExpanderRow):
             else:
                 self.thinking_label.set_markup(f"<i>Thinking:</i>\n<tt>{GLib.markup_escape_text(thinking)}</tt>")
 
+class HistoryItem(GObject.Object):
+    def __init__(self, entry):
+        super().__init__()
+        self.entry = entry
+
+class HistoryModel(GObject.Object, Gio.ListModel):
+    """Gio.ListModel over a HistoryIndex. Items are only built for the rows Gtk.ListView asks for."""
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        self._items = {}
+
+    def do_get_item_type(self):
+        return HistoryItem.__gtype__
+
+    def do_get_n_items(self):
+        return len(self.index)
+
+    def do_get_item(self, position):
+        if position >= len(self.index):
+            return None
+        item = self._items.get(position)
+        if item is None:
+            item = HistoryItem(self.index[position])
+            self._items[position] = item
+        return item
+
 class LLMComparatorApp(Adw.Application):
     def __init__(self, **kwargs):
         super().__init__(application_id='com.example.LLMComparator', **kwargs)
         self.comparator = LLMComparator()
-        self.loop = asyncio.new_event_loop()
-        self.worker_thread = threading.Thread(target=self._run_event_loop, daemon=True)
-        self.worker_thread.start()
+        self.running = False
+        self.shown_comparison = None
+        self.comparator.events.subscribe(self.on_pipeline_event, [EventType.MODEL_START, EventType.FIRST_TOKEN])
+        self._tasks = set()
+        if GLibEventLoopPolicy is not None:
+            # Coroutines and GTK callbacks share the main thread, so results can
+            # update widgets directly and no state crosses threads.
+            policy = GLibEventLoopPolicy()
+            asyncio.set_event_loop_policy(policy)
+            self.loop = policy.get_event_loop()
+            self.worker_thread = None
+        else:
+            # Older PyGObject: keep asyncio on a worker thread and hop back with idle_add.
+            self.loop = asyncio.new_event_loop()
+            self.worker_thread = threading.Thread(target=self._run_event_loop, daemon=True)
+            self.worker_thread.start()
 
     def _run_event_loop(self):
         asyncio.set_event_loop(self.loop)
         self.loop.run_forever()
 
+    def spawn(self, coro):
+        """Schedule a coroutine on the loop that drives the comparator."""
+        if self.worker_thread is None:
+            task = self.loop.create_task(coro)
+            # Hold a reference until completion so the task is not garbage collected.
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_in_ui(self, callback, *args):
+        """Run a widget update from coroutine code, hopping threads only in fallback mode."""
+        if self.worker_thread is None:
+            callback(*args)
+        else:
+            GLib.idle_add(callback, *args)
+
     def do_activate(self):
         builder = Gtk.Builder()
         # Minimal UI structure in code
@@ -74,6 +139,10 @@ class LLMComparatorApp(Adw.Application):
         self.cancel_btn.connect("clicked", self.on_cancel_clicked)
         header.pack_start(self.cancel_btn)
 
+        self.history_btn = Gtk.Button(icon_name="document-open-recent-symbolic", tooltip_text="History")
+        self.history_btn.connect("clicked", self.on_history_clicked)
+        header.pack_end(self.history_btn)
+
         # Keyboard Shortcut for Esc (Cancel)
         controller = Gtk.ShortcutController()
         shortcut = Gtk.Shortcut.new(
@@ -155,8 +224,15 @@ class LLMComparatorApp(Adw.Application):
         res_scroll.set_vexpand(True)
         results_page.append(res_scroll)
 
+        res_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=24)
+        res_scroll.set_child(res_box)
+
         self.results_group = Adw.PreferencesGroup(title="Comparison Results")
-        res_scroll.set_child(self.results_group)
+        res_box.append(self.results_group)
+
+        self.similarity_group = Adw.PreferencesGroup(title="Output Similarity", visible=False)
+        res_box.append(self.similarity_group)
+        self.similarity_widget = None
 
         # Footer with Back Button
         footer = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
@@ -166,15 +242,47 @@ class LLMComparatorApp(Adw.Application):
         footer.append(back_btn)
         results_page.append(footer)
 
+        # History Page
+        history_page = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        history_page.set_margin_start(12)
+        history_page.set_margin_end(12)
+        history_page.set_margin_top(12)
+        history_page.set_margin_bottom(12)
+        self.stack.add_titled(history_page, "history", "History")
+
+        self.history_title = Gtk.Label(xalign=0)
+        self.history_title.add_css_class("title-4")
+        history_page.append(self.history_title)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_history_item_setup)
+        factory.connect("bind", self.on_history_item_bind)
+        self.history_selection = Gtk.SingleSelection(autoselect=False)
+        history_view = Gtk.ListView(model=self.history_selection, factory=factory, single_click_activate=True)
+        history_view.add_css_class("boxed-list")
+        history_view.connect("activate", self.on_history_activate)
+
+        history_scroll = Gtk.ScrolledWindow()
+        history_scroll.set_vexpand(True)
+        history_scroll.set_child(history_view)
+        history_page.append(history_scroll)
+
+        history_footer = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        history_back_btn = Gtk.Button(label="Back to Setup")
+        history_back_btn.set_icon_name("go-previous-symbolic")
+        history_back_btn.connect("clicked", lambda x: self.stack.set_visible_child_name("setup"))
+        history_footer.append(history_back_btn)
+        history_page.append(history_footer)
+
         self.window.present()
         self.load_models()
 
     def load_models(self):
         async def fetch():
             models = await self.comparator.get_available_models()
-            GLib.idle_add(self.update_model_list, models)
+            self.call_in_ui(self.update_model_list, models)
 
-        asyncio.run_coroutine_threadsafe(fetch(), self.loop)
+        self.spawn(fetch())
 
     def update_model_list(self, models):
         for m in models:
@@ -197,6 +305,8 @@ class LLMComparatorApp(Adw.Application):
             self.results_group.remove(row)
 
         self.result_rows = {}
+        self.shown_comparison = None
+        self.show_similarity(None)
         for m_id in selected_ids:
             row = ResultRow(m_id)
             self.results_group.add(row)
@@ -205,36 +315,218 @@ class LLMComparatorApp(Adw.Application):
         self.system_prompt_display.set_subtitle(system_prompt)
         self.user_prompt_display.set_subtitle(prompt)
 
+        self.status_banner.set_title("Processing Comparisons...")
         self.status_banner.set_visible(True)
         self.cancel_btn.set_visible(True)
         self.stack.set_visible_child_name("results")
         
         self.run_btn = btn
         self.run_btn.set_sensitive(False)
+        # Reopening a stored comparison would replace the rows the live run is filling in.
+        self.running = True
+        self.history_btn.set_sensitive(False)
 
-        asyncio.run_coroutine_threadsafe(
-            self.run_comparison(prompt, system_prompt, selected_ids), 
-            self.loop
-        )
+        self.spawn(self.run_comparison(prompt, system_prompt, selected_ids))
+
+    def on_history_clicked(self, btn):
+        storage = self.comparator.storage
+        self.stack.set_visible_child_name("history")
+        if storage.has_index():
+            self.show_history(storage.history())
+            return
+
+        # Rebuilding a missing index scans every stored file; keep that off the main loop.
+        self.history_model = HistoryModel([])
+        self.history_selection.set_model(self.history_model)
+        self.history_title.set_text("Building history index...")
+        self.history_btn.set_sensitive(False)
+        self.spawn(self.build_history())
+
+    async def build_history(self):
+        try:
+            index = await asyncio.to_thread(self.comparator.storage.history)
+        except Exception as e:
+            self.call_in_ui(self.history_title.set_text, f"Failed to build history index: {e}")
+            index = None
+        self.call_in_ui(self.show_history, index)
+
+    def show_history(self, index):
+        self.history_btn.set_sensitive(not self.running)
+        if index is None:
+            return
+        self.history_model = HistoryModel(index)
+        self.history_selection.set_model(self.history_model)
+        self.history_title.set_text(f"{len(index)} stored comparisons")
+
+    def on_history_item_setup(self, factory, list_item):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+        box.set_margin_start(12)
+        box.set_margin_end(12)
+        box.set_margin_top(6)
+        box.set_margin_bottom(6)
+        title = Gtk.Label(xalign=0, ellipsize=Pango.EllipsizeMode.END, single_line_mode=True)
+        subtitle = Gtk.Label(xalign=0, ellipsize=Pango.EllipsizeMode.END, single_line_mode=True)
+        subtitle.add_css_class("dim-label")
+        box.append(title)
+        box.append(subtitle)
+        list_item.set_child(box)
+
+    def on_history_item_bind(self, factory, list_item):
+        entry = list_item.get_item().entry
+        title = list_item.get_child().get_first_child()
+        subtitle = title.get_next_sibling()
+        title.set_text(entry.get("prompt") or "(empty prompt)")
+        timestamp = (entry.get("timestamp") or "")[:19].replace("T", " ")
+        subtitle.set_text(f"{timestamp} | {entry.get('status', '')} | {', '.join(m or '' for m in entry.get('models', []))}")
+
+    def on_history_activate(self, list_view, position):
+        if self.running:
+            return
+        entry = self.history_model.do_get_item(position).entry
+        if not entry.get("file"):
+            return
+        try:
+            data = self.comparator.storage.load_comparison(entry["file"])
+        except Exception as e:
+            self.history_title.set_text(f"Failed to load {entry['file']}: {e}")
+            return
+
+        for row in list(self.result_rows.values()):
+            self.results_group.remove(row)
+
+        self.result_rows = {}
+        prompt = data.get("prompt") or {}
+        self.system_prompt_display.set_subtitle(prompt.get("system") or "")
+        self.user_prompt_display.set_subtitle(prompt.get("user") or "")
+        for res in data.get("results", []):
+            row = ResultRow(res["model_id"])
+            self.results_group.add(row)
+            self.result_rows[res["model_id"]] = row
+            self.update_result(res)
+
+        self.show_similarity(None)
+        self.shown_comparison = data
+        self.spawn(self.analyze_reopened(data))
+        self.stack.set_visible_child_name("results")
+
+    async def analyze_reopened(self, data):
+        report = await asyncio.to_thread(analyze_comparison, data)
+        self.call_in_ui(self.show_reopened_similarity, data, report)
+
+    def show_reopened_similarity(self, data, report):
+        # Another comparison may have been opened while this one was analysed.
+        if self.shown_comparison is data:
+            self.show_similarity(report)
 
     def on_cancel_clicked(self, sender):
-        self.comparator.cancel()
+        if self.worker_thread is None:
+            self.comparator.cancel()
+        else:
+            # asyncio.Event is not thread-safe; set it from the loop's own thread.
+            self.loop.call_soon_threadsafe(self.comparator.cancel)
         self.status_banner.set_title("Cancelling...")
         self.cancel_btn.set_sensitive(False)
 
     async def run_comparison(self, prompt, system_prompt, selected_ids):
-        async for res in self.comparator.run_comparison(prompt, selected_ids, system_prompt):
-            GLib.idle_add(self.update_result, res)
-        
-        GLib.idle_add(self.finish_run)
+        results = []
+        report = None
+        error = None
+        try:
+            async for res in self.comparator.run_comparison(prompt, selected_ids, system_prompt):
+                results.append(res)
+                self.call_in_ui(self.update_result, res)
+            
+            report = await asyncio.to_thread(analyze_comparison, results)
+        except Exception as e:
+            print(f"Comparison failed: {e}")
+            error = e
+        finally:
+            # Always restore the buttons, or a failed save would lock the UI for the session.
+            self.call_in_ui(self.finish_run, report, error)
+
+    def show_similarity(self, report):
+        if self.similarity_widget:
+            self.similarity_group.remove(self.similarity_widget)
+            self.similarity_widget = None
+        if not report or len(report["models"]) < 2:
+            self.similarity_group.set_visible(False)
+            return
 
-    def finish_run(self):
-        self.status_banner.set_visible(False)
-        self.status_banner.set_title("Processing Comparisons...")
+        models = report["models"]
+        grid = Gtk.Grid(column_spacing=12, row_spacing=4)
+        for j in range(len(models)):
+            header = Gtk.Label(label=str(j + 1))
+            header.add_css_class("dim-label")
+            grid.attach(header, j + 2, 0, 1, 1)
+        for i, (m_id, row) in enumerate(zip(models, report["matrix"])):
+            index_label = Gtk.Label(label=str(i + 1), xalign=1)
+            index_label.add_css_class("dim-label")
+            grid.attach(index_label, 0, i + 1, 1, 1)
+            name_label = Gtk.Label(label=m_id, xalign=0, ellipsize=Pango.EllipsizeMode.END, max_width_chars=32)
+            if m_id in report["outliers"]:
+                name_label.add_css_class("warning")
+            grid.attach(name_label, 1, i + 1, 1, 1)
+            for j, value in enumerate(row):
+                text = f"{value:.2f}"
+                if report["exact"] and report["exact"][i][j] is not None:
+                    text += f"/{report['exact'][i][j]:.2f}"
+                cell = Gtk.Label(label="-" if i == j else text, xalign=1)
+                if i == j:
+                    cell.add_css_class("dim-label")
+                elif value >= NEAR_DUPLICATE_THRESHOLD:
+                    cell.add_css_class("error")
+                grid.attach(cell, j + 2, i + 1, 1, 1)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        box.set_margin_start(12)
+        box.set_margin_end(12)
+        box.set_margin_top(12)
+        box.set_margin_bottom(12)
+        grid_scroll = Gtk.ScrolledWindow(vscrollbar_policy=Gtk.PolicyType.NEVER)
+        grid_scroll.set_propagate_natural_height(True)
+        grid_scroll.set_child(grid)
+        box.append(grid_scroll)
+
+        if report["exact"]:
+            legend = Gtk.Label(label="MinHash Jaccard / word diff ratio (diff only for short answers)", xalign=0)
+            legend.add_css_class("dim-label")
+            box.append(legend)
+
+        notes = [f"Near-duplicate: {p['a']} ~ {p['b']} ({p['similarity']:.2f})" for p in report["near_duplicates"]]
+        if report["outliers"]:
+            notes.append(f"Outliers: {', '.join(report['outliers'])}")
+        if notes:
+            box.append(Gtk.Label(label="\n".join(notes), xalign=0, wrap=True, selectable=True))
+
+        self.similarity_widget = box
+        self.similarity_group.add(box)
+        self.similarity_group.set_visible(True)
+
+    def on_pipeline_event(self, event):
+        self.call_in_ui(self.update_status, event)
+
+    def update_status(self, event):
+        row = self.result_rows.get(event["model_id"])
+        if not row: return
+
+        if event["type"] == EventType.MODEL_START:
+            row.set_subtitle("Running...")
+        else:
+            row.set_subtitle(f"Generating... | Load: {event['load_time']:.2f}s")
+
+    def finish_run(self, report=None, error=None):
+        self.show_similarity(report)
+        if error:
+            self.status_banner.set_title(f"Comparison failed: {error}")
+        else:
+            self.status_banner.set_visible(False)
+            self.status_banner.set_title("Processing Comparisons...")
         self.cancel_btn.set_visible(False)
         self.cancel_btn.set_sensitive(True)
         if hasattr(self, 'run_btn'):
             self.run_btn.set_sensitive(True)
+        self.running = False
+        self.history_btn.set_sensitive(True)
 
     def update_result(self, res):
         m_id = res["model_id"]
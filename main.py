@@ -3,6 +3,8 @@ from typing import List, Dict, Any, Optional
 from api_client import LMStudioClient
 from model_manager import ModelManager, ModelState
 from storage import ComparisonStorage
+from events import EventBus, EventType
+from telemetry import install_from_env
 
 class LLMComparator:
     def __init__(self, base_url: str = "http://localhost:1234/v1"):
@@ -10,6 +12,8 @@ class LLMComparator:
         self.model_manager = ModelManager()
         self.storage = ComparisonStorage()
         self.cancellation_event = asyncio.Event()
+        self.events = EventBus()
+        install_from_env(self.events)
 
     async def run_comparison(self, 
                              prompt: str, 
@@ -18,12 +22,20 @@ class LLMComparator:
                              params: Dict[str, Any] = None):
         import re
         import time
+        import uuid
         self.cancellation_event.clear()
+        events = self.events
+        run_id = uuid.uuid4().hex
+        cancelled_model = None
+        if events.wants(EventType.RUN_START):
+            events.emit(EventType.RUN_START, run_id=run_id, models=list(selected_model_ids), params=params or {})
         all_results = []
         for model_id in selected_model_ids:
             if self.cancellation_event.is_set():
                 break
             state_before = self.model_manager.get_state(model_id)
+            if events.wants(EventType.MODEL_START):
+                events.emit(EventType.MODEL_START, run_id=run_id, model_id=model_id)
             
             start_time = time.time()
             first_chunk_time = None
@@ -48,14 +60,20 @@ class LLMComparator:
             try:
                 async for chunk in self.client.generate_stream(model_id, prompt, system_prompt, params):
                     if self.cancellation_event.is_set():
+                        cancelled_model = model_id
                         break
 
                     if not first_chunk_time:
                         first_chunk_time = time.time()
+                        if events.wants(EventType.FIRST_TOKEN):
+                            events.emit(EventType.FIRST_TOKEN, run_id=run_id, model_id=model_id,
+                                        load_time=first_chunk_time - start_time)
                     
                     if "error" in chunk:
                         model_entry["error"] = chunk
                         self.model_manager.mark_failure(model_id)
+                        if events.wants(EventType.ERROR):
+                            events.emit(EventType.ERROR, run_id=run_id, model_id=model_id, error=chunk)
                         break
                     
                     # Store usage if present (usually in the last chunk with stream_options)
@@ -71,16 +89,23 @@ class LLMComparator:
                     
                     if content_chunk:
                         full_content += content_chunk
+                        if events.wants(EventType.CHUNK):
+                            events.emit(EventType.CHUNK, run_id=run_id, model_id=model_id, text=content_chunk)
                         
                         # Timing and logic for thinking vs content
                         if "<think>" in content_chunk:
                             in_thinking = True
                             think_start_time = time.time()
+                            if events.wants(EventType.THINK_START):
+                                events.emit(EventType.THINK_START, run_id=run_id, model_id=model_id)
                         
                         if "</think>" in content_chunk:
                             in_thinking = False
                             think_end_time = time.time()
                             content_start_time = time.time()
+                            if events.wants(EventType.THINK_END):
+                                events.emit(EventType.THINK_END, run_id=run_id, model_id=model_id,
+                                            think_time=(think_end_time - think_start_time) if think_start_time else 0)
                         
                         if not in_thinking and not content_start_time and content_chunk.strip():
                             content_start_time = time.time()
@@ -111,11 +136,37 @@ class LLMComparator:
             except Exception as e:
                 model_entry["error"] = {"error": "Processing error", "detail": str(e)}
                 self.model_manager.mark_failure(model_id)
+                if events.wants(EventType.ERROR):
+                    events.emit(EventType.ERROR, run_id=run_id, model_id=model_id, error=model_entry["error"])
+
+            if events.wants(EventType.MODEL_END):
+                if model_entry["error"]:
+                    status = "error"
+                elif cancelled_model == model_id:
+                    status = "cancelled"
+                else:
+                    status = "ok"
+                events.emit(EventType.MODEL_END, run_id=run_id, model_id=model_id, status=status,
+                            timing=model_entry["timing"], usage=model_entry["usage"])
 
             all_results.append(model_entry)
-            yield model_entry
+            try:
+                yield model_entry
+            except GeneratorExit:
+                # The consumer stopped iterating (the TUI does so after a cancel); close the run for observers.
+                if events.wants(EventType.CANCEL) and self.cancellation_event.is_set():
+                    events.emit(EventType.CANCEL, run_id=run_id, model_id=cancelled_model)
+                if events.wants(EventType.RUN_END):
+                    events.emit(EventType.RUN_END, run_id=run_id, file=None, models_completed=len(all_results))
+                raise
             
-        self.storage.save_comparison(prompt, all_results, system_prompt, params)
+        if events.wants(EventType.CANCEL) and self.cancellation_event.is_set():
+            events.emit(EventType.CANCEL, run_id=run_id, model_id=cancelled_model)
+        # Compression, blob writes and a possible index rebuild must not stall the
+        # loop, which in the GUI is the GTK main loop.
+        filepath = await asyncio.to_thread(self.storage.save_comparison, prompt, all_results, system_prompt, params)
+        if events.wants(EventType.RUN_END):
+            events.emit(EventType.RUN_END, run_id=run_id, file=filepath, models_completed=len(all_results))
 
     async def get_available_models(self) -> List[Dict[str, Any]]:
         return await self.client.list_models()
@@ -2,13 +2,112 @@ import json
 import datetime
 import uuid
 import os
-from typing import Dict, Any, List, Optional
+import gzip
+import hashlib
+import argparse
+import functools
+from typing import Dict, Any, List, Optional, Tuple
+
+INDEX_FILENAME = "index.jsonl"
+SNIPPET_LENGTH = 120
+
+FORMAT_VERSION = 2
+BLOB_DIRNAME = "blobs"
+BLOB_REF_KEY = "$blob"
+# Result texts shorter than this stay inline; prompts always go to the blob store.
+BLOB_MIN_LENGTH = 1024
+COMPRESS_LEVEL = 6
+# Number of decoded blobs kept in memory; older ones are re-read from disk.
+BLOB_CACHE_SIZE = 256
+
+class BlobStore:
+    """Content-addressed store for long texts, keyed by the SHA-256 of their UTF-8 bytes."""
+    def __init__(self, root: str):
+        self.root = root
+        self._load = functools.lru_cache(maxsize=BLOB_CACHE_SIZE)(self._read)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.gz")
+
+    def put(self, text: str) -> str:
+        raw = text.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(raw, compresslevel=COMPRESS_LEVEL))
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> str:
+        return self._load(digest)
+
+    def _read(self, digest: str) -> str:
+        with open(self._path(digest), 'rb') as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+class HistoryIndex:
+    """Newest-first view over the comparison index.
+
+    Only line offsets are computed up front; an entry is decoded the first
+    time it is accessed, so opening the history stays cheap no matter how
+    many comparisons have been stored.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._data = b""
+        self._offsets: List[int] = []
+        self._cache: Dict[int, Dict[str, Any]] = {}
+        self.reload()
+
+    def reload(self):
+        self._cache = {}
+        self._offsets = []
+        if not os.path.exists(self.path):
+            self._data = b""
+            return
+        with open(self.path, 'rb') as f:
+            self._data = f.read()
+        pos = 0
+        size = len(self._data)
+        while pos < size:
+            end = self._data.find(b"\n", pos)
+            if end == -1:
+                end = size
+            if end > pos:
+                self._offsets.append(pos)
+            pos = end + 1
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0:
+            i += len(self._offsets)
+        if not 0 <= i < len(self._offsets):
+            raise IndexError(i)
+        entry = self._cache.get(i)
+        if entry is None:
+            start = self._offsets[-1 - i]
+            end = self._data.find(b"\n", start)
+            line = self._data[start:end if end != -1 else len(self._data)]
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                entry = {"comparison_id": None, "timestamp": "", "file": None,
+                         "prompt": "<corrupt index entry>", "models": [], "status": "unknown"}
+            self._cache[i] = entry
+        return entry
 
 class ComparisonStorage:
     def __init__(self, output_dir: str = "results"):
         self.output_dir = output_dir
+        self.index_path = os.path.join(output_dir, INDEX_FILENAME)
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
+        self.blobs = BlobStore(os.path.join(output_dir, BLOB_DIRNAME))
 
     def save_comparison(self, 
                         prompt: str, 
@@ -30,10 +129,196 @@ class ComparisonStorage:
             "results": models_results
         }
         
-        filename = f"comparison_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{comparison_id[:8]}.json"
-        filepath = os.path.join(self.output_dir, filename)
-        
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        filename = f"comparison_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{comparison_id[:8]}.json.gz"
+        filepath = self._write_record(filename, data)
             
+        # Build the index from what is already on disk before appending to it,
+        # otherwise older comparisons would never show up in the history.
+        if not os.path.exists(self.index_path):
+            self.rebuild_index()
+        else:
+            self._append_index([self._index_entry(filename, data)])
+
+        return filepath
+
+    def load_comparison(self, filename: str) -> Dict[str, Any]:
+        """Load a full comparison by the file name recorded in the index.
+
+        Both compact (`.json.gz`) records and legacy pretty-printed `.json`
+        files are accepted; blob references are resolved transparently.
+        """
+        data = self._read_record(filename)
+        if filename.endswith(".gz"):
+            return self._unpack(data)
+        return data
+
+    def _read_record(self, filename: str) -> Dict[str, Any]:
+        """Decode a comparison file as stored, leaving blob references unresolved."""
+        filepath = os.path.join(self.output_dir, filename)
+        if filename.endswith(".gz"):
+            with gzip.open(filepath, 'rt', encoding="utf-8") as f:
+                return json.load(f)
+        with open(filepath, 'r') as f:
+            return json.load(f)
+
+    def compact(self) -> Tuple[int, int, int]:
+        """Rewrite legacy `.json` comparisons in the compact format and rebuild the index.
+
+        Returns the number of files converted and their total size before and after.
+        """
+        converted = 0
+        size_before = 0
+        size_after = 0
+        for filename in self._comparison_files():
+            if not filename.endswith(".json"):
+                continue
+            legacy_path = os.path.join(self.output_dir, filename)
+            try:
+                data = self.load_comparison(filename)
+            except (OSError, ValueError):
+                continue
+            size_before += os.path.getsize(legacy_path)
+            size_after += os.path.getsize(self._write_record(filename + ".gz", data))
+            os.remove(legacy_path)
+            converted += 1
+
+        self.rebuild_index()
+        return converted, size_before, size_after
+
+    def has_index(self) -> bool:
+        """Whether history() can return without first rebuilding the index."""
+        return os.path.exists(self.index_path)
+
+    def history(self) -> HistoryIndex:
+        """Return the comparison index, building it first if it is missing.
+
+        A rebuild reads every comparison file; UIs should check has_index() and
+        call this off their main loop when it returns False.
+        """
+        if not os.path.exists(self.index_path):
+            self.rebuild_index()
+        return HistoryIndex(self.index_path)
+
+    def rebuild_index(self) -> int:
+        """Regenerate the index by scanning every comparison file. Returns the entry count."""
+        entries = []
+        for filename in self._comparison_files():
+            try:
+                # Only the user prompt is needed, so skip resolving result blobs.
+                entries.append(self._index_entry(filename, self._read_record(filename)))
+            except (OSError, ValueError):
+                continue
+
+        # A save in a worker thread may rebuild concurrently; keep the temp files apart.
+        tmp_path = f"{self.index_path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, 'w') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.index_path)
+        return len(entries)
+
+    def _comparison_files(self) -> List[str]:
+        # File names start with a sortable timestamp, so name order is chronological.
+        return sorted(
+            name for name in os.listdir(self.output_dir)
+            if name.startswith("comparison_") and name.endswith((".json", ".json.gz"))
+        )
+
+    def _write_record(self, filename: str, data: Dict[str, Any]) -> str:
+        filepath = os.path.join(self.output_dir, filename)
+        tmp_path = filepath + ".tmp"
+        payload = json.dumps(self._pack(data), separators=(",", ":")).encode("utf-8")
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(payload, compresslevel=COMPRESS_LEVEL))
+        os.replace(tmp_path, filepath)
         return filepath
+
+    def _pack(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Move prompts and long texts into the blob store and drop per-model
+        parameters that just repeat `global_parameters`."""
+        global_params = data.get("global_parameters") or {}
+        prompt = data.get("prompt") or {}
+        results = []
+        for entry in data.get("results", []):
+            entry = dict(entry)
+            if entry.get("parameters", {}) == global_params:
+                entry.pop("parameters", None)
+            if entry.get("result"):
+                result = dict(entry["result"])
+                for key in ("content", "thinking"):
+                    text = result.get(key)
+                    if isinstance(text, str) and len(text) >= BLOB_MIN_LENGTH:
+                        result[key] = {BLOB_REF_KEY: self.blobs.put(text)}
+                entry["result"] = result
+            results.append(entry)
+
+        packed = dict(data)
+        packed["format"] = FORMAT_VERSION
+        packed["prompt"] = {
+            key: {BLOB_REF_KEY: self.blobs.put(text)} if text else text
+            for key, text in prompt.items()
+        }
+        packed["results"] = results
+        return packed
+
+    def _unpack(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        def resolve(value):
+            if isinstance(value, dict) and BLOB_REF_KEY in value:
+                return self.blobs.get(value[BLOB_REF_KEY])
+            return value
+
+        global_params = data.get("global_parameters") or {}
+        data.pop("format", None)
+        data["prompt"] = {key: resolve(text) for key, text in (data.get("prompt") or {}).items()}
+        for entry in data.get("results", []):
+            entry.setdefault("parameters", dict(global_params))
+            result = entry.get("result")
+            if result:
+                for key in ("content", "thinking"):
+                    if key in result:
+                        result[key] = resolve(result[key])
+        return data
+
+    def _append_index(self, entries: List[Dict[str, Any]]):
+        with open(self.index_path, 'a') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def _index_entry(self, filename: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        results = data.get("results", [])
+        failed = sum(1 for r in results if r.get("error"))
+        if not results:
+            status = "empty"
+        elif failed == 0:
+            status = "ok"
+        elif failed == len(results):
+            status = "failed"
+        else:
+            status = "partial"
+
+        user_prompt = (data.get("prompt") or {}).get("user") or ""
+        if isinstance(user_prompt, dict) and BLOB_REF_KEY in user_prompt:
+            user_prompt = self.blobs.get(user_prompt[BLOB_REF_KEY])
+        snippet = " ".join(user_prompt.split())[:SNIPPET_LENGTH]
+        return {
+            "comparison_id": data.get("comparison_id"),
+            "timestamp": data.get("timestamp"),
+            "file": filename,
+            "prompt": snippet,
+            "models": [r.get("model_id") for r in results],
+            "status": status
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintenance commands for stored comparisons.")
+    parser.add_argument("command", choices=["compact", "reindex"],
+                        help="compact: convert legacy JSON results to the compact format; reindex: rebuild the history index")
+    parser.add_argument("--results-dir", default="results", help="Directory holding the comparisons (default: results)")
+    args = parser.parse_args()
+
+    storage = ComparisonStorage(args.results_dir)
+    if args.command == "compact":
+        converted, before, after = storage.compact()
+        print(f"Converted {converted} comparisons: {before / 1024:.1f} KiB -> {after / 1024:.1f} KiB (plus shared blobs)")
+    else:
+        print(f"Indexed {storage.rebuild_index()} comparisons")
@@ -0,0 +1,224 @@
+import atexit
+import json
+import os
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Set, Tuple
+from events import EventBus, EventType
+
+TRACE_FILE_ENV = "LLM_COMPARE_TRACE_FILE"
+METRICS_PORT_ENV = "LLM_COMPARE_METRICS_PORT"
+METRICS_HOST = "127.0.0.1"
+
+class TraceFileSink:
+    """Writes pipeline events as a Chrome trace (chrome://tracing, Perfetto).
+
+    Each run, model generation and thinking phase becomes a span; first tokens,
+    errors and cancellations are instant events. The file uses the JSON array
+    trace format, whose closing bracket is optional, so events are appended after
+    each model and at the end of a run (and at exit) instead of rewriting
+    earlier runs. A killed batch keeps everything up to its last finished model.
+    """
+    TYPES = [EventType.RUN_START, EventType.MODEL_START, EventType.FIRST_TOKEN, EventType.THINK_START,
+             EventType.THINK_END, EventType.MODEL_END, EventType.ERROR, EventType.CANCEL, EventType.RUN_END]
+
+    def __init__(self, path: str):
+        self.path = path
+        # Events not yet written; flushed at MODEL_END, RUN_END and exit.
+        self.trace_events: List[Dict[str, Any]] = []
+        self._open_think: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def attach(self, bus: EventBus) -> "TraceFileSink":
+        bus.subscribe(self.handle, self.TYPES)
+        atexit.register(self.flush)
+        return self
+
+    def handle(self, event: Dict[str, Any]):
+        etype = event["type"]
+        model_id = event.get("model_id")
+        record = {
+            "pid": os.getpid(),
+            # Run-level events go on their own track; each model gets one below it.
+            "tid": 0 if etype in (EventType.RUN_START, EventType.RUN_END) else 1,
+            "ts": event["time"] * 1e6,
+            "cat": "llm-compare"
+        }
+        if etype == EventType.RUN_START:
+            record.update(ph="B", name="run", args={"run_id": event["run_id"], "models": event["models"]})
+        elif etype == EventType.RUN_END:
+            record.update(ph="E", name="run", args={"file": event["file"]})
+        elif etype == EventType.MODEL_START:
+            record.update(ph="B", name=model_id)
+        elif etype == EventType.MODEL_END:
+            if model_id in self._open_think:
+                # Errors and cancels can end a model mid-think; close that span first
+                # so it does not swallow the model's end event.
+                self._open_think.discard(model_id)
+                with self._lock:
+                    self.trace_events.append(dict(record, ph="E", name="think"))
+            record.update(ph="E", name=model_id,
+                          args={"status": event["status"], "timing": event["timing"], "usage": event["usage"]})
+        elif etype == EventType.THINK_START:
+            self._open_think.add(model_id)
+            record.update(ph="B", name="think")
+        elif etype == EventType.THINK_END:
+            self._open_think.discard(model_id)
+            record.update(ph="E", name="think")
+        else:
+            args = {"model_id": model_id}
+            if etype == EventType.ERROR:
+                args["error"] = event["error"]
+            record.update(ph="i", s="t", name=etype.value, args=args)
+
+        with self._lock:
+            self.trace_events.append(record)
+        if etype in (EventType.MODEL_END, EventType.RUN_END):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self.trace_events = self.trace_events, []
+        if not pending:
+            return
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a') as f:
+            if new_file:
+                f.write("[\n")
+            for record in pending:
+                f.write(json.dumps(record, separators=(",", ":")) + ",\n")
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+class MetricsServer:
+    """Aggregates pipeline events and serves them in the Prometheus text format.
+
+    Scrape `http://127.0.0.1:<port>/metrics`. The HTTP server runs on a daemon
+    thread; all counters are guarded by a lock.
+    """
+    def __init__(self, port: int, host: str = METRICS_HOST):
+        self.host = host
+        self.port = port
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+        self._active_runs = 0
+        self._current_model: Optional[str] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def attach(self, bus: EventBus) -> "MetricsServer":
+        bus.subscribe(self.handle)
+        return self
+
+    def _inc(self, name: str, value: float = 1, **labels):
+        self._counters[(name, tuple(sorted(labels.items())))] += value
+
+    def handle(self, event: Dict[str, Any]):
+        etype = event["type"]
+        model_id = event.get("model_id")
+        with self._lock:
+            if etype == EventType.CHUNK:
+                self._inc("llm_compare_chunks_total", model=model_id)
+            elif etype == EventType.RUN_START:
+                self._active_runs += 1
+                self._inc("llm_compare_runs_total")
+            elif etype == EventType.RUN_END:
+                self._active_runs = max(0, self._active_runs - 1)
+                self._current_model = None
+            elif etype == EventType.MODEL_START:
+                self._current_model = model_id
+            elif etype == EventType.FIRST_TOKEN:
+                self._inc("llm_compare_load_seconds_sum", event["load_time"], model=model_id)
+                self._inc("llm_compare_load_seconds_count", model=model_id)
+            elif etype == EventType.THINK_END:
+                self._inc("llm_compare_think_seconds_sum", event["think_time"], model=model_id)
+                self._inc("llm_compare_think_seconds_count", model=model_id)
+            elif etype == EventType.MODEL_END:
+                self._current_model = None
+                self._inc("llm_compare_model_runs_total", model=model_id, status=event["status"])
+                total_time = event["timing"].get("total_time")
+                if total_time is not None:
+                    self._inc("llm_compare_model_seconds_sum", total_time, model=model_id)
+                    self._inc("llm_compare_model_seconds_count", model=model_id)
+                completion_tokens = event["usage"].get("completion_tokens")
+                if completion_tokens:
+                    self._inc("llm_compare_completion_tokens_total", completion_tokens, model=model_id)
+            elif etype == EventType.ERROR:
+                self._inc("llm_compare_errors_total", model=model_id)
+            elif etype == EventType.CANCEL:
+                self._inc("llm_compare_cancellations_total")
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            active_runs = self._active_runs
+            current_model = self._current_model
+
+        lines = [
+            "# TYPE llm_compare_active_runs gauge",
+            f"llm_compare_active_runs {active_runs}",
+        ]
+        if current_model is not None:
+            lines.append("# TYPE llm_compare_current_model gauge")
+            lines.append(f'llm_compare_current_model{{model="{_escape_label(current_model)}"}} 1')
+
+        typed = set()
+        for (name, labels), value in counters:
+            family = name
+            for suffix in ("_sum", "_count"):
+                if name.endswith(suffix):
+                    family = name[:-len(suffix)]
+            if family not in typed:
+                typed.add(family)
+                lines.append(f"# TYPE {family} {'counter' if family == name else 'summary'}")
+            label_str = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{label_str}}} {value:g}" if label_str else f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def start(self) -> "MetricsServer":
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Keep scrapes out of the TUI.
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+def install_from_env(bus: EventBus):
+    """Attach the built-in sinks requested through environment variables.
+
+    LLM_COMPARE_TRACE_FILE=<path> writes a Chrome trace; LLM_COMPARE_METRICS_PORT=<port>
+    serves Prometheus metrics on localhost.
+    """
+    trace_path = os.environ.get(TRACE_FILE_ENV)
+    if trace_path:
+        TraceFileSink(trace_path).attach(bus)
+
+    port = os.environ.get(METRICS_PORT_ENV)
+    if port:
+        try:
+            MetricsServer(int(port)).attach(bus).start()
+        except (ValueError, OSError) as e:
+            print(f"Error starting metrics server on port {port}: {e}")
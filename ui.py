@@ -1,11 +1,52 @@
 from textual.app import App, ComposeResult
 from textual.widgets import Header, Footer, ListView, ListItem, Label, Input, Button, Static, RichLog, Checkbox
 from textual.containers import Container, Horizontal, Vertical
+from textual.screen import Screen
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.geometry import Size
+from textual.message import Message
+from textual.reactive import reactive
 from textual import work
+from rich.segment import Segment
+from rich.style import Style
+from rich.table import Table
 import asyncio
 import os
 from main import LLMComparator
 from model_manager import ModelState
+from analysis import analyze_comparison, NEAR_DUPLICATE_THRESHOLD
+from events import EventType
+
+def write_similarity(log: RichLog, report: dict):
+    """Render an analyze_comparison() report as a similarity matrix table."""
+    models = report["models"]
+    if len(models) < 2:
+        return
+    exact = report.get("exact")
+    title = "Output Similarity (MinHash Jaccard / word diff ratio)" if exact else "Output Similarity (MinHash Jaccard)"
+    table = Table(title=title, title_justify="left", show_lines=False)
+    table.add_column("#", style="dim")
+    table.add_column("Model")
+    for i in range(len(models)):
+        table.add_column(str(i + 1), justify="right", no_wrap=True)
+    for i, (m_id, row) in enumerate(zip(models, report["matrix"])):
+        cells = []
+        for j, value in enumerate(row):
+            if i == j:
+                cells.append("[dim]-[/]")
+                continue
+            cell = f"{value:.2f}"
+            if exact and exact[i][j] is not None:
+                cell += f"/{exact[i][j]:.2f}"
+            cells.append(f"[bold red]{cell}[/]" if value >= NEAR_DUPLICATE_THRESHOLD else cell)
+        label = f"[yellow]{m_id}[/]" if m_id in report["outliers"] else m_id
+        table.add_row(str(i + 1), label, *cells)
+    log.write(table)
+    for pair in report["near_duplicates"]:
+        log.write(f"[bold red]Near-duplicate:[/] {pair['a']} ~ {pair['b']} ({pair['similarity']:.2f})")
+    if report["outliers"]:
+        log.write(f"[yellow]Outliers:[/] {', '.join(report['outliers'])}")
 
 class ModelItem(ListItem):
     def __init__(self, model_data: dict, initial_state: ModelState):
@@ -25,6 +66,154 @@ class ModelItem(ListItem):
             id=f"item-{safe_id}"
         )
 
+class HistoryList(ScrollView, can_focus=True):
+    """Windowed list over a HistoryIndex: only the visible rows are ever rendered."""
+    BINDINGS = [
+        ("up", "cursor_up", "Up"),
+        ("down", "cursor_down", "Down"),
+        ("pageup", "page_up", "Page Up"),
+        ("pagedown", "page_down", "Page Down"),
+        ("enter", "select", "Open"),
+    ]
+
+    cursor = reactive(0)
+
+    class Selected(Message):
+        def __init__(self, entry: dict):
+            super().__init__()
+            self.entry = entry
+
+    def __init__(self, index, **kwargs):
+        super().__init__(**kwargs)
+        self.set_index(index)
+
+    def set_index(self, index):
+        self.index = index
+        self.virtual_size = Size(0, len(index))
+        self.cursor = 0
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        row = scroll_y + y
+        width = self.size.width
+        if row >= len(self.index):
+            return Strip.blank(width)
+
+        entry = self.index[row]
+        timestamp = (entry.get("timestamp") or "")[:19].replace("T", " ")
+        text = f"{timestamp}  {entry.get('status', ''):<7} {len(entry.get('models', [])):>3}m  {entry.get('prompt', '')}"
+        style = Style(reverse=True) if row == self.cursor else Style()
+        # Pad/crop by terminal cells, not characters, so wide glyphs cannot overflow the pane.
+        return Strip([Segment(text, style)]).adjust_cell_length(width, style)
+
+    def watch_cursor(self, old: int, new: int):
+        if new < self.scroll_offset.y:
+            self.scroll_to(y=new, animate=False)
+        elif new >= self.scroll_offset.y + self.size.height:
+            self.scroll_to(y=new - self.size.height + 1, animate=False)
+        self.refresh()
+
+    def action_cursor_up(self):
+        self.cursor = max(0, self.cursor - 1)
+
+    def action_cursor_down(self):
+        if not len(self.index):
+            return
+        self.cursor = min(len(self.index) - 1, self.cursor + 1)
+
+    def action_page_up(self):
+        self.cursor = max(0, self.cursor - self.size.height)
+
+    def action_page_down(self):
+        if not len(self.index):
+            return
+        self.cursor = min(len(self.index) - 1, self.cursor + self.size.height)
+
+    def action_select(self):
+        if len(self.index):
+            self.post_message(self.Selected(self.index[self.cursor]))
+
+    def on_click(self, event):
+        # event.y includes the border; only clicks inside the content area pick a row.
+        offset = event.get_content_offset(self)
+        if offset is None:
+            return
+        row = self.scroll_offset.y + offset.y
+        if len(self.index) and row < len(self.index):
+            self.cursor = row
+            self.action_select()
+
+class HistoryScreen(Screen):
+    BINDINGS = [
+        ("escape", "app.pop_screen", "Back"),
+    ]
+
+    def __init__(self, storage):
+        super().__init__()
+        self.storage = storage
+        # A missing index means scanning every stored file; that happens in load_index().
+        self.index = storage.history() if storage.has_index() else None
+
+    def compose(self) -> ComposeResult:
+        title = "Building history index..." if self.index is None else f"History ({len(self.index)} comparisons)"
+        yield Header()
+        yield Horizontal(
+            Vertical(
+                Label(title, classes="section-title", id="history-title"),
+                HistoryList(self.index if self.index is not None else [], id="history-list"),
+            ),
+            RichLog(id="history-detail", highlight=True, markup=True, wrap=True),
+        )
+        yield Footer()
+
+    def on_mount(self) -> None:
+        self.query_one("#history-list", HistoryList).focus()
+        if self.index is None:
+            self.load_index()
+
+    @work(exclusive=True)
+    async def load_index(self):
+        try:
+            index = await asyncio.to_thread(self.storage.history)
+        except Exception as e:
+            self.query_one("#history-title", Label).update(f"Failed to build history index: {e}")
+            return
+        self.index = index
+        self.query_one("#history-list", HistoryList).set_index(index)
+        self.query_one("#history-title", Label).update(f"History ({len(index)} comparisons)")
+
+    async def on_history_list_selected(self, event: HistoryList.Selected) -> None:
+        log = self.query_one("#history-detail", RichLog)
+        log.clear()
+        if not event.entry.get("file"):
+            log.write("[red]This index entry is unreadable.[/]")
+            return
+        try:
+            data = self.storage.load_comparison(event.entry["file"])
+        except Exception as e:
+            log.write(f"[red]Failed to load {event.entry['file']}: {e}[/]")
+            return
+
+        prompt = data.get("prompt") or {}
+        log.write(f"[bold]{data.get('timestamp', '')}[/]  [dim]{data.get('comparison_id', '')}[/]")
+        log.write(f"[bold blue]SYSTEM:[/]\n{prompt.get('system') or ''}")
+        log.write(f"[bold blue]USER:[/]\n{prompt.get('user') or ''}")
+        for res in data.get("results", []):
+            log.write("-" * 20)
+            if res.get("error"):
+                log.write(f"[red]{res['model_id']}: {res['error'].get('detail', res['error'])}[/]")
+                continue
+            t = res.get("timing", {})
+            log.write(f"[green]{res['model_id']}[/] [dim]Total: {t.get('total_time', 0):.2f}s[/]")
+            result = res.get("result") or {}
+            if result.get("thinking"):
+                log.write("[italic blue]Thinking:[/]")
+                log.write(result["thinking"])
+            log.write(result.get("content", ""))
+        log.write("-" * 20)
+        write_similarity(log, await asyncio.to_thread(analyze_comparison, data))
+
 class LLMStudioTUI(App):
     CSS = """
     Screen {
@@ -73,16 +262,28 @@ class LLMStudioTUI(App):
         width: auto;
         margin-right: 1;
     }
+    #history-list {
+        width: 1fr;
+        height: 1fr;
+        border: solid #45475a;
+    }
+    #history-detail {
+        width: 1fr;
+        border: solid #45475a;
+        background: #181825;
+    }
     """
 
     BINDINGS = [
         ("escape", "cancel_run", "Cancel"),
         ("ctrl+r", "refresh_models", "Refresh"),
+        ("ctrl+o", "show_history", "History"),
     ]
 
     def __init__(self):
         super().__init__()
         self.comparator = LLMComparator()
+        self.comparator.events.subscribe(self.on_pipeline_event, [EventType.MODEL_START, EventType.FIRST_TOKEN])
         self.models = []
         self.running_comparison = False
 
@@ -99,6 +300,7 @@ class LLMStudioTUI(App):
                 Horizontal(
                     Button("Run Comparison", variant="primary", id="run-btn"),
                     Button("Refresh Models", id="refresh-btn"),
+                    Button("History", id="history-btn"),
                 ),
                 RichLog(id="log", highlight=True, markup=True),
                 id="main-container"
@@ -132,8 +334,10 @@ class LLMStudioTUI(App):
         log.write("-" * 40)
         log.write(f"[bold cyan]Starting comparison for {len(selected_ids)} models...[/]")
         
+        results = []
         try:
             async for res in self.comparator.run_comparison(prompt, selected_ids, system_prompt):
+                results.append(res)
                 if self.comparator.cancellation_event.is_set():
                     log.write("[bold yellow]Comparison cancelled by user.[/]")
                     break
@@ -155,6 +359,8 @@ class LLMStudioTUI(App):
                     log.write(res["result"]["content"][:300] + "...")
                     log.write("-" * 20)
             
+            # The pairwise diff ratios are quadratic; keep them off the event loop.
+            write_similarity(log, await asyncio.to_thread(analyze_comparison, results))
             if not self.comparator.cancellation_event.is_set():
                 log.write("[bold green]All finished. Results saved to /results folder.[/]")
         except Exception as e:
@@ -163,15 +369,27 @@ class LLMStudioTUI(App):
             self.running_comparison = False
             await self.refresh_models()
 
+    def on_pipeline_event(self, event: dict):
+        log = self.query_one("#log", RichLog)
+        if event["type"] == EventType.MODEL_START:
+            log.write(f"[dim]Running {event['model_id']}...[/]")
+        else:
+            log.write(f"[dim]First token after {event['load_time']:.2f}s[/]")
+
     def action_cancel_run(self):
         if self.running_comparison:
             self.comparator.cancel()
             self.query_one("#log", RichLog).write("[bold yellow]Cancellation requested...[/]")
             self.running_comparison = False
 
+    def action_show_history(self):
+        self.push_screen(HistoryScreen(self.comparator.storage))
+
     async def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "refresh-btn":
             await self.refresh_models()
+        elif event.button.id == "history-btn":
+            self.action_show_history()
         elif event.button.id == "run-btn":
             prompt = self.query_one("#prompt-input", Input).value
             system_prompt = self.query_one("#system-prompt", Input).value